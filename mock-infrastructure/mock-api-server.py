@@ -5,17 +5,93 @@ Mock API Server for ArcDeploy Testing
 Simulates cloud provider API responses for comprehensive testing scenarios
 """
 
+import copy
 import json
 import time
 import random
 import argparse
+import asyncio
 import threading
-from datetime import datetime, timedelta
-from http.server import HTTPServer, BaseHTTPRequestHandler
+from datetime import datetime, timedelta, timezone
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
 from urllib.parse import urlparse, parse_qs
 import logging
 import os
 import sys
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from types import MappingProxyType
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import uvicorn
+    from starlette.applications import Starlette
+    from starlette.responses import Response
+    from starlette.routing import Route
+except ImportError:
+    uvicorn = None
+
+# ============================================================================
+# JSON Serialization
+# ============================================================================
+
+def json_dumps(data):
+    """Serialize data to indented JSON bytes, using orjson when available"""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2)
+    return json.dumps(data, indent=2).encode('utf-8')
+
+def json_loads(raw):
+    """Parse JSON bytes, using orjson when available"""
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+# ============================================================================
+# Random Number Generation
+# ============================================================================
+
+_thread_state = threading.local()
+
+def thread_rng():
+    """Return a random.Random instance owned by the calling thread"""
+    rng = getattr(_thread_state, 'rng', None)
+    if rng is None:
+        rng = _thread_state.rng = random.Random()
+    return rng
+
+def generate_request_id(prefix='req'):
+    """Generate a 32-bit random request ID from the OS entropy pool"""
+    return f"{prefix}_{os.urandom(4).hex()}"
+
+# ============================================================================
+# Timestamps
+# ============================================================================
+
+# (epoch second, ISO string, ISO bytes); swapped as a whole tuple so readers
+# never see a torn update, at worst a value from the previous second
+_timestamp_cache = (0, '', b'')
+
+def utc_timestamp():
+    """Current UTC time as an ISO 8601 string, cached per second"""
+    return _cached_timestamp()[1]
+
+def utc_timestamp_bytes():
+    """Current UTC time as UTF-8 encoded ISO 8601, cached per second"""
+    return _cached_timestamp()[2]
+
+def _cached_timestamp():
+    global _timestamp_cache
+    second = int(time.time())
+    cached = _timestamp_cache
+    if cached[0] != second:
+        iso = datetime.fromtimestamp(second, timezone.utc).isoformat()
+        cached = _timestamp_cache = (second, iso, iso.encode('utf-8'))
+    return cached
 
 # ============================================================================
 # Configuration
@@ -30,6 +106,9 @@ class MockAPIConfig:
         self.failure_rate = 0.1  # 10% chance of failure
         self.rate_limit_requests = 100
         self.rate_limit_window = 3600  # 1 hour
+        self.rate_limit_max_clients = 100000
+        self.max_concurrent_requests = 256
+        self.backend = 'threading'  # 'threading' or 'asgi'
         self.test_data_dir = os.path.join(os.path.dirname(__file__), '..', 'test-data')
         
     def from_env(self):
@@ -39,6 +118,8 @@ class MockAPIConfig:
         self.response_delay_min = float(os.getenv('MOCK_API_DELAY_MIN', self.response_delay_min))
         self.response_delay_max = float(os.getenv('MOCK_API_DELAY_MAX', self.response_delay_max))
         self.failure_rate = float(os.getenv('MOCK_API_FAILURE_RATE', self.failure_rate))
+        self.max_concurrent_requests = int(os.getenv('MOCK_API_MAX_CONCURRENT', self.max_concurrent_requests))
+        self.backend = os.getenv('MOCK_API_BACKEND', self.backend)
         return self
 
 # ============================================================================
@@ -46,50 +127,146 @@ class MockAPIConfig:
 # ============================================================================
 
 class RateLimiter:
+    LOCK_STRIPES = 64
+    
+    # Fraction of rate_limit_max_clients kept after a cap-triggered sweep, so
+    # one sweep buys headroom instead of running again on the next request
+    LOW_WATER_RATIO = 0.9
+    
     def __init__(self, config):
         self.config = config
         self.requests = {}
-        self.lock = threading.Lock()
+        self.locks = [threading.Lock() for _ in range(self.LOCK_STRIPES)]
+        self.sweep_lock = threading.Lock()
+        self.next_sweep = time.time() + self.config.rate_limit_window / 10
+    
+    def _lock_for(self, client_ip):
+        """Return the lock stripe guarding a client's request history"""
+        return self.locks[hash(client_ip) & (self.LOCK_STRIPES - 1)]
     
-    def is_rate_limited(self, client_ip):
-        with self.lock:
+    def is_rate_limited(self, client_ip, sweep=True):
+        # Must run outside the stripe lock, since sweeping takes stripe locks itself.
+        # Callers that can't afford an inline sweep pass sweep=False and run
+        # maybe_sweep themselves.
+        if sweep:
+            self.maybe_sweep()
+        
+        with self._lock_for(client_ip):
             now = time.time()
             window_start = now - self.config.rate_limit_window
             
-            if client_ip not in self.requests:
-                self.requests[client_ip] = []
+            # setdefault is atomic, so new IPs on other stripes can't race here
+            request_times = self.requests.get(client_ip)
+            if request_times is None:
+                request_times = self.requests.setdefault(client_ip, deque())
             
-            # Clean old requests
-            self.requests[client_ip] = [
-                req_time for req_time in self.requests[client_ip] 
-                if req_time > window_start
-            ]
+            # Drop expired requests from the front of the window
+            while request_times and request_times[0] <= window_start:
+                request_times.popleft()
             
             # Check if rate limited
-            if len(self.requests[client_ip]) >= self.config.rate_limit_requests:
+            if len(request_times) >= self.config.rate_limit_requests:
                 return True
             
             # Add current request
-            self.requests[client_ip].append(now)
+            request_times.append(now)
             return False
     
     def get_rate_limit_info(self, client_ip):
-        with self.lock:
-            current_count = len(self.requests.get(client_ip, []))
-            remaining = max(0, self.config.rate_limit_requests - current_count)
-            reset_time = int(time.time() + self.config.rate_limit_window)
+        with self._lock_for(client_ip):
+            request_times = self.requests.get(client_ip, ())
+            remaining = max(0, self.config.rate_limit_requests - len(request_times))
+            
+            # The window resets when the oldest tracked request expires
+            oldest = request_times[0] if request_times else time.time()
+            reset_time = int(oldest + self.config.rate_limit_window)
             
             return {
                 'limit': self.config.rate_limit_requests,
                 'remaining': remaining,
                 'reset': reset_time
             }
+    
+    def tracked_clients(self):
+        """Number of client IPs currently holding rate-limit state"""
+        return len(self.requests)
+    
+    def sweep_due(self):
+        """Whether the periodic sweep is due or the client cap is exceeded"""
+        return time.time() >= self.next_sweep or len(self.requests) > self.config.rate_limit_max_clients
+    
+    def maybe_sweep(self):
+        """Sweep idle clients periodically, or as soon as the client cap is exceeded"""
+        if not self.sweep_due():
+            return
+        
+        # Only one thread sweeps at a time; the rest carry on without waiting
+        if not self.sweep_lock.acquire(blocking=False):
+            return
+        try:
+            now = time.time()
+            self.next_sweep = now + self.config.rate_limit_window / 10
+            self.sweep(now)
+        finally:
+            self.sweep_lock.release()
+    
+    def sweep(self, now):
+        """Drop clients whose requests have all expired, then enforce the client cap"""
+        window_start = now - self.config.rate_limit_window
+        
+        for client_ip, request_times in list(self.requests.items()):
+            # The newest request is on the right; if it has expired, so have the rest
+            if request_times and request_times[-1] > window_start:
+                continue
+            with self._lock_for(client_ip):
+                if not request_times or request_times[-1] <= window_start:
+                    self.requests.pop(client_ip, None)
+        
+        # Expired clients are gone; if still over the cap, evict down to the
+        # low-water mark. Evicting a client resets its window, which lets it
+        # bypass its limit, so clients currently at their limit go last and
+        # the rest are evicted longest-tracked first.
+        if len(self.requests) > self.config.rate_limit_max_clients:
+            excess = len(self.requests) - int(self.config.rate_limit_max_clients * self.LOW_WATER_RATIO)
+            limit = self.config.rate_limit_requests
+            under_limit = []
+            at_limit = []
+            for client_ip, request_times in list(self.requests.items()):
+                (at_limit if len(request_times) >= limit else under_limit).append(client_ip)
+            
+            for client_ip in (under_limit + at_limit)[:excess]:
+                with self._lock_for(client_ip):
+                    self.requests.pop(client_ip, None)
+        
+        logging.debug(f"Rate limiter tracking {self.tracked_clients()} clients")
 
 # ============================================================================
 # Mock Response Generator
 # ============================================================================
 
+# Default scenario served for each action
+_SCENARIO_MAP = MappingProxyType({
+    'servers': 'success-create-server',
+    'instances': 'success-create-server',
+    'droplets': 'success-create-server',
+    'create-server': 'success-create-server',
+    'list-servers': 'success-list-servers',
+    'server-status': 'success-server-status'
+})
+
+# (status_code, error_code, message) choices for random failure simulation
+_RANDOM_FAILURES = (
+    (500, 'internal_server_error', 'Internal server error occurred'),
+    (503, 'service_unavailable', 'Service temporarily unavailable'),
+    (502, 'bad_gateway', 'Bad gateway error'),
+    (504, 'gateway_timeout', 'Gateway timeout')
+)
+
 class MockResponseGenerator:
+    TIMESTAMP_FIELDS = ('timestamp', 'created', 'started', 'finished')
+    TIMESTAMP_PLACEHOLDER = '__TS__'
+    REQUEST_ID_PLACEHOLDER = '__RID__'
+    
     def __init__(self, config):
         self.config = config
         self.load_test_data()
@@ -97,31 +274,92 @@ class MockResponseGenerator:
     def load_test_data(self):
         """Load test data from files"""
         self.responses = {}
+        self.compiled = {}
+        self.dispatch = {}
         cloud_providers_dir = os.path.join(self.config.test_data_dir, 'cloud-providers')
         
-        if not os.path.exists(cloud_providers_dir):
+        # Collect every response file first so they can be read in parallel
+        try:
+            tasks = self.collect_response_files(cloud_providers_dir)
+        except FileNotFoundError:
             logging.warning(f"Test data directory not found: {cloud_providers_dir}")
             return
         
-        for provider in os.listdir(cloud_providers_dir):
-            provider_dir = os.path.join(cloud_providers_dir, provider)
-            if not os.path.isdir(provider_dir):
-                continue
+        if tasks:
+            max_workers = min(len(tasks), (os.cpu_count() or 1) * 4)
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                loaded = list(executor.map(self.load_response_file, tasks))
             
-            self.responses[provider] = {}
-            api_responses_dir = os.path.join(provider_dir, 'api-responses')
-            
-            if os.path.exists(api_responses_dir):
-                for response_file in os.listdir(api_responses_dir):
-                    if response_file.endswith('.json'):
-                        response_name = response_file[:-5]  # Remove .json extension
-                        file_path = os.path.join(api_responses_dir, response_file)
-                        
-                        try:
-                            with open(file_path, 'r') as f:
-                                self.responses[provider][response_name] = json.load(f)
-                        except Exception as e:
-                            logging.error(f"Failed to load response file {file_path}: {e}")
+            for provider, response_name, data in loaded:
+                if data is None:
+                    continue
+                
+                self.responses[provider][response_name] = data
+                
+                # Serialize once; per-request fields are filled in by placeholder
+                template = self.build_template(data)
+                self.compiled[provider][response_name] = json_dumps(template)
+        
+        for provider in self.compiled:
+            self.dispatch[provider] = self.build_dispatch(provider)
+    
+    def collect_response_files(self, cloud_providers_dir):
+        """Register each provider and list its response files as (provider, name, path)"""
+        tasks = []
+        with os.scandir(cloud_providers_dir) as providers:
+            for provider_entry in providers:
+                if not provider_entry.is_dir():
+                    continue
+                
+                provider = provider_entry.name
+                self.responses[provider] = {}
+                self.compiled[provider] = {}
+                
+                try:
+                    with os.scandir(os.path.join(provider_entry.path, 'api-responses')) as response_files:
+                        for response_file in response_files:
+                            if response_file.name.endswith('.json') and response_file.is_file():
+                                response_name = response_file.name[:-5]  # Remove .json extension
+                                tasks.append((provider, response_name, response_file.path))
+                except FileNotFoundError:
+                    # A provider without canned responses is still listed
+                    continue
+        
+        return tasks
+    
+    def build_dispatch(self, provider):
+        """Build a provider's router with every action resolved to its template up front"""
+        templates = self.compiled[provider]
+        action_templates = {action: templates.get(scenario) for action, scenario in _SCENARIO_MAP.items()}
+        default_template = templates.get('success-create-server')
+        render_template = self.render_template
+        
+        def dispatch(action, query_params):
+            # Returns None when the scenario has no template, so the caller
+            # can fall back to the generic path and its error response
+            if 'scenario' in query_params:
+                template = templates.get(query_params['scenario'][0])
+            else:
+                template = action_templates.get(action, default_template)
+            return render_template(template) if template is not None else None
+        
+        return dispatch
+    
+    def load_response_file(self, task):
+        """Read and parse one response file; returns (provider, name, data or None)"""
+        provider, response_name, file_path = task
+        try:
+            with open(file_path, 'rb') as f:
+                return provider, response_name, json_loads(f.read())
+        except Exception as e:
+            logging.error(f"Failed to load response file {file_path}: {e}")
+            return provider, response_name, None
+    
+    def build_template(self, response):
+        """Copy a response, swapping dynamic fields for placeholders"""
+        template = copy.deepcopy(response)
+        self.transform_response(template, self.TIMESTAMP_PLACEHOLDER, self.REQUEST_ID_PLACEHOLDER, {})
+        return template
     
     def get_response(self, provider, scenario, **kwargs):
         """Get mock response for a specific provider and scenario"""
@@ -131,63 +369,125 @@ class MockResponseGenerator:
         if scenario not in self.responses[provider]:
             return self.generate_error_response(404, "scenario_not_found", f"Scenario '{scenario}' not found for provider '{provider}'")
         
-        response = self.responses[provider][scenario].copy()
+        response = copy.deepcopy(self.responses[provider][scenario])
         
         # Customize response with dynamic data
         response = self.customize_response(response, **kwargs)
         
         return response
     
+    def get_response_bytes(self, provider, scenario):
+        """Get serialized mock response, rendered from the precompiled template"""
+        template = self.compiled.get(provider, {}).get(scenario)
+        if template is None:
+            return json_dumps(self.get_response(provider, scenario))
+        return self.render_template(template)
+    
+    def get_template(self, provider, scenario):
+        """Get the compiled template for a scenario, or a templated error response"""
+        template = self.compiled.get(provider, {}).get(scenario)
+        if template is None:
+            # Compile the error body too, so each render still gets a fresh
+            # timestamp and request ID
+            return json_dumps(self.build_template(self.get_response(provider, scenario)))
+        return template
+    
+    def render_template(self, template):
+        """Fill a compiled template's placeholders with a fresh timestamp and request ID"""
+        now = utc_timestamp_bytes()
+        request_id = generate_request_id().encode('utf-8')
+        return (template
+                .replace(self.TIMESTAMP_PLACEHOLDER.encode('utf-8'), now)
+                .replace(self.REQUEST_ID_PLACEHOLDER.encode('utf-8'), request_id))
+    
     def customize_response(self, response, **kwargs):
         """Customize response with dynamic data"""
-        # Update timestamps
-        now = datetime.utcnow().isoformat() + '+00:00'
-        self.update_timestamps(response, now)
+        now = utc_timestamp()
+        request_id = generate_request_id()
+        self.transform_response(response, now, request_id, kwargs)
+        return response
+    
+    def transform_response(self, response, timestamp, request_id, overrides):
+        """Update timestamps, request IDs and overridden keys in a single pass"""
+        stack = [response]
+        while stack:
+            obj = stack.pop()
+            if isinstance(obj, dict):
+                for key, value in obj.items():
+                    if key in overrides:
+                        obj[key] = overrides[key]
+                    elif key in self.TIMESTAMP_FIELDS and value:
+                        obj[key] = timestamp
+                    elif key == 'request_id':
+                        obj[key] = request_id
+                    elif isinstance(value, (dict, list)):
+                        stack.append(value)
+            else:
+                stack.extend(item for item in obj if isinstance(item, (dict, list)))
+    
+    def respond(self, method, path, query_params):
+        """Build the response for a request path; returns (status_code, response)"""
+        path_parts = path.strip('/').split('/')
+        
+        try:
+            if len(path_parts) >= 2:
+                provider = path_parts[0]
+                action = path_parts[1]
+                
+                return 200, self.route_request(provider, action, method, query_params)
+            else:
+                return 404, {
+                    'error': 'Invalid API endpoint',
+                    'message': 'Expected format: /{provider}/{action}'
+                }
+        
+        except Exception as e:
+            logging.error(f"Error handling request: {e}")
+            return 500, {
+                'error': 'Internal server error',
+                'message': str(e)
+            }
+    
+    def route_request(self, provider, action, method, query_params):
+        """Route request to appropriate handler"""
+        # Special endpoints for testing different scenarios
+        if action == 'test-scenarios':
+            return self.handle_test_scenarios(provider, query_params)
+        
+        # Fast path: the provider's prebuilt router
+        dispatch = self.dispatch.get(provider)
+        if dispatch is not None:
+            response = dispatch(action, query_params)
+            if response is not None:
+                return response
         
-        # Update request ID
-        self.update_request_id(response)
+        # Default routing based on action
+        scenario = _SCENARIO_MAP.get(action, 'success-create-server')
         
-        # Apply customizations from kwargs
-        for key, value in kwargs.items():
-            self.deep_update(response, key, value)
+        # Check for specific test scenarios in query params
+        if 'scenario' in query_params:
+            scenario = query_params['scenario'][0]
         
-        return response
+        return self.get_response_bytes(provider, scenario)
+    
+    def handle_test_scenarios(self, provider, query_params):
+        """Handle test scenario requests"""
+        available_scenarios = list(self.responses.get(provider, {}).keys())
+        return {
+            'provider': provider,
+            'available_scenarios': available_scenarios,
+            'usage': f'Add ?scenario=<scenario_name> to test specific scenarios',
+            'examples': [
+                f'/{provider}/servers?scenario=rate-limit-exceeded',
+                f'/{provider}/servers?scenario=quota-exceeded',
+                f'/{provider}/servers?scenario=auth-failed'
+            ]
+        }
     
-    def update_timestamps(self, obj, timestamp):
-        """Recursively update timestamp fields"""
-        if isinstance(obj, dict):
-            for key, value in obj.items():
-                if key in ['timestamp', 'created', 'started', 'finished'] and value:
-                    obj[key] = timestamp
-                elif isinstance(value, (dict, list)):
-                    self.update_timestamps(value, timestamp)
-        elif isinstance(obj, list):
-            for item in obj:
-                self.update_timestamps(item, timestamp)
-    
-    def update_request_id(self, obj):
-        """Update request ID with random value"""
-        if isinstance(obj, dict):
-            for key, value in obj.items():
-                if key == 'request_id':
-                    obj[key] = f"req_{random.randint(100000, 999999)}"
-                elif isinstance(value, (dict, list)):
-                    self.update_request_id(value)
-        elif isinstance(obj, list):
-            for item in obj:
-                self.update_request_id(item)
-    
-    def deep_update(self, obj, key, value):
-        """Deep update of nested dictionaries"""
-        if isinstance(obj, dict):
-            if key in obj:
-                obj[key] = value
-            for v in obj.values():
-                if isinstance(v, (dict, list)):
-                    self.deep_update(v, key, value)
-        elif isinstance(obj, list):
-            for item in obj:
-                self.deep_update(item, key, value)
+    def generate_random_failure(self):
+        """Pick a random server-side failure; returns (status_code, response)"""
+        status_code, error_code, message = thread_rng().choice(_RANDOM_FAILURES)
+        return status_code, self.generate_error_response(status_code, error_code, message)
     
     def generate_error_response(self, status_code, error_code, message):
         """Generate standardized error response"""
@@ -198,21 +498,50 @@ class MockResponseGenerator:
                 'status_code': status_code
             },
             'meta': {
-                'request_id': f"req_error_{random.randint(100000, 999999)}",
-                'timestamp': datetime.utcnow().isoformat() + '+00:00',
+                'request_id': generate_request_id('req_error'),
+                'timestamp': utc_timestamp(),
                 'api_version': 'v1'
             }
         }
 
+# ============================================================================
+# Request Helpers
+# ============================================================================
+
+def delay_enabled(config, query_params, headers):
+    """Check whether the artificial response delay applies to a request"""
+    if config.response_delay_max <= 0:
+        return False
+    
+    # Clients can opt out with ?delay=false or an X-Mock-Delay: false header
+    opt_out = ('0', 'false', 'no', 'off')
+    if query_params.get('delay', [''])[0].lower() in opt_out:
+        return False
+    return headers.get('X-Mock-Delay', '').lower() not in opt_out
+
 # ============================================================================
 # HTTP Request Handler
 # ============================================================================
 
 class MockAPIHandler(BaseHTTPRequestHandler):
-    def __init__(self, *args, config=None, rate_limiter=None, response_generator=None, **kwargs):
+    # Keep connections open between requests; idle ones are closed after the timeout
+    protocol_version = 'HTTP/1.1'
+    timeout = 60
+    
+    # CORS headers for browser testing, identical on every response
+    CORS_HEADERS = (
+        b"Access-Control-Allow-Origin: *\r\n"
+        b"Access-Control-Allow-Methods: GET, POST, PUT, DELETE, OPTIONS\r\n"
+        b"Access-Control-Allow-Headers: Content-Type, Authorization\r\n"
+    )
+    
+    def __init__(self, *args, config=None, rate_limiter=None, response_generator=None, concurrency=None,
+                 rate_limit_template=None, **kwargs):
         self.config = config
         self.rate_limiter = rate_limiter
         self.response_generator = response_generator
+        self.concurrency = concurrency
+        self.rate_limit_template = rate_limit_template
         super().__init__(*args, **kwargs)
     
     def log_message(self, format, *args):
@@ -233,11 +562,19 @@ class MockAPIHandler(BaseHTTPRequestHandler):
     
     def handle_request(self, method):
         """Handle all HTTP requests"""
+        with self.concurrency:
+            self.process_request(method)
+    
+    def process_request(self, method):
+        """Process a request once a concurrency slot is held"""
         client_ip = self.client_address[0]
         
-        # Add artificial delay
-        delay = random.uniform(self.config.response_delay_min, self.config.response_delay_max)
-        time.sleep(delay)
+        # Consume any request body so it isn't read as the next request
+        self.discard_request_body()
+        
+        # Parse request
+        url_parts = urlparse(self.path)
+        query_params = parse_qs(url_parts.query)
         
         # Check rate limiting
         if self.rate_limiter.is_rate_limited(client_ip):
@@ -245,114 +582,128 @@ class MockAPIHandler(BaseHTTPRequestHandler):
             return
         
         # Random failure simulation
-        if random.random() < self.config.failure_rate:
+        if thread_rng().random() < self.config.failure_rate:
             self.send_random_failure_response()
             return
         
-        # Parse request
-        url_parts = urlparse(self.path)
-        path_parts = url_parts.path.strip('/').split('/')
-        query_params = parse_qs(url_parts.query)
+        # Add artificial delay only once the request will be served
+        if delay_enabled(self.config, query_params, self.headers):
+            delay = thread_rng().uniform(self.config.response_delay_min, self.config.response_delay_max)
+            time.sleep(delay)
         
         # Route request
-        try:
-            if len(path_parts) >= 2:
-                provider = path_parts[0]
-                action = path_parts[1]
-                
-                response = self.route_request(provider, action, method, query_params)
-                self.send_json_response(200, response)
-            else:
-                self.send_json_response(404, {
-                    'error': 'Invalid API endpoint',
-                    'message': 'Expected format: /{provider}/{action}'
-                })
-        
-        except Exception as e:
-            logging.error(f"Error handling request: {e}")
-            self.send_json_response(500, {
-                'error': 'Internal server error',
-                'message': str(e)
-            })
+        status_code, response = self.response_generator.respond(method, url_parts.path, query_params)
+        self.send_json_response(status_code, response)
     
-    def route_request(self, provider, action, method, query_params):
-        """Route request to appropriate handler"""
-        # Special endpoints for testing different scenarios
-        if action == 'test-scenarios':
-            return self.handle_test_scenarios(provider, query_params)
-        
-        # Default routing based on action
-        scenario_map = {
-            'servers': 'success-create-server',
-            'instances': 'success-create-server',
-            'droplets': 'success-create-server',
-            'create-server': 'success-create-server',
-            'list-servers': 'success-list-servers',
-            'server-status': 'success-server-status'
-        }
-        
-        scenario = scenario_map.get(action, 'success-create-server')
+    def discard_request_body(self):
+        """Read and drop the request body, if any"""
+        if self.headers.get('Transfer-Encoding', '').lower() == 'chunked':
+            # Not worth decoding for a mock; just don't reuse the connection
+            self.close_connection = True
+            return
         
-        # Check for specific test scenarios in query params
-        if 'scenario' in query_params:
-            scenario = query_params['scenario'][0]
+        try:
+            content_length = int(self.headers.get('Content-Length') or 0)
+        except ValueError:
+            content_length = -1
         
-        return self.response_generator.get_response(provider, scenario)
-    
-    def handle_test_scenarios(self, provider, query_params):
-        """Handle test scenario requests"""
-        available_scenarios = list(self.response_generator.responses.get(provider, {}).keys())
-        return {
-            'provider': provider,
-            'available_scenarios': available_scenarios,
-            'usage': f'Add ?scenario=<scenario_name> to test specific scenarios',
-            'examples': [
-                f'/{provider}/servers?scenario=rate-limit-exceeded',
-                f'/{provider}/servers?scenario=quota-exceeded',
-                f'/{provider}/servers?scenario=auth-failed'
-            ]
-        }
+        if content_length < 0:
+            # Malformed length: answer as usual, but the body can't be framed
+            self.close_connection = True
+        elif content_length > 0:
+            self.rfile.read(content_length)
     
     def send_json_response(self, status_code, data):
-        """Send JSON response with proper headers"""
-        response_data = json.dumps(data, indent=2).encode('utf-8')
+        """Send JSON response with proper headers; data may be pre-serialized bytes"""
+        if isinstance(data, bytes):
+            response_data = data
+        else:
+            response_data = json_dumps(data)
         
-        self.send_response(status_code)
-        self.send_header('Content-Type', 'application/json')
-        self.send_header('Content-Length', str(len(response_data)))
-        
-        # Add rate limit headers
+        self.log_request(status_code)
         rate_info = self.rate_limiter.get_rate_limit_info(self.client_address[0])
-        self.send_header('X-RateLimit-Limit', str(rate_info['limit']))
-        self.send_header('X-RateLimit-Remaining', str(rate_info['remaining']))
-        self.send_header('X-RateLimit-Reset', str(rate_info['reset']))
         
-        # CORS headers for browser testing
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'GET, POST, PUT, DELETE, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type, Authorization')
+        # Build the status line and headers by hand so the whole response
+        # goes out in a single write instead of one per header
+        header_block = (
+            f"{self.protocol_version} {status_code} {self.responses[status_code][0]}\r\n"
+            f"Server: {self.version_string()}\r\n"
+            f"Date: {self.date_time_string()}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(response_data)}\r\n"
+            f"Connection: {'close' if self.close_connection else 'keep-alive'}\r\n"
+            f"X-RateLimit-Limit: {rate_info['limit']}\r\n"
+            f"X-RateLimit-Remaining: {rate_info['remaining']}\r\n"
+            f"X-RateLimit-Reset: {rate_info['reset']}\r\n"
+        ).encode('latin-1')
         
-        self.end_headers()
-        self.wfile.write(response_data)
+        self.wfile.write(header_block + self.CORS_HEADERS + b"\r\n" + response_data)
     
     def send_rate_limit_response(self):
         """Send rate limit exceeded response"""
-        response = self.response_generator.get_response('hetzner', 'rate-limit-exceeded')
+        response = self.response_generator.render_template(self.rate_limit_template)
         self.send_json_response(429, response)
     
     def send_random_failure_response(self):
         """Send random failure response"""
-        failures = [
-            (500, 'internal_server_error', 'Internal server error occurred'),
-            (503, 'service_unavailable', 'Service temporarily unavailable'),
-            (502, 'bad_gateway', 'Bad gateway error'),
-            (504, 'gateway_timeout', 'Gateway timeout')
-        ]
-        
-        status_code, error_code, message = random.choice(failures)
-        response = self.response_generator.generate_error_response(status_code, error_code, message)
+        status_code, response = self.response_generator.generate_random_failure()
         self.send_json_response(status_code, response)
 
+# ============================================================================
+# ASGI Application (optional, requires starlette and uvicorn)
+# ============================================================================
+
+def create_asgi_app(config, rate_limiter, response_generator, rate_limit_template):
+    """Create a Starlette app serving the same API as MockAPIHandler"""
+    
+    def json_response(client_ip, status_code, data):
+        rate_info = rate_limiter.get_rate_limit_info(client_ip)
+        return Response(
+            content=data if isinstance(data, bytes) else json_dumps(data),
+            status_code=status_code,
+            media_type='application/json',
+            headers={
+                'X-RateLimit-Limit': str(rate_info['limit']),
+                'X-RateLimit-Remaining': str(rate_info['remaining']),
+                'X-RateLimit-Reset': str(rate_info['reset']),
+                'Access-Control-Allow-Origin': '*',
+                'Access-Control-Allow-Methods': 'GET, POST, PUT, DELETE, OPTIONS',
+                'Access-Control-Allow-Headers': 'Content-Type, Authorization'
+            }
+        )
+    
+    async def handle_request(request):
+        client_ip = request.client.host if request.client else 'unknown'
+        query_params = parse_qs(request.url.query)
+        
+        # Sweeping is O(tracked clients), so run it on a worker thread rather
+        # than stalling every connection on the event loop
+        if rate_limiter.sweep_due():
+            asyncio.get_running_loop().run_in_executor(None, rate_limiter.maybe_sweep)
+        
+        # Check rate limiting. The threading stripe locks are safe here:
+        # nothing awaits while one is held, so the loop never blocks on them
+        # for longer than the handful of deque operations they guard.
+        if rate_limiter.is_rate_limited(client_ip, sweep=False):
+            response = response_generator.render_template(rate_limit_template)
+            return json_response(client_ip, 429, response)
+        
+        # Random failure simulation
+        if thread_rng().random() < config.failure_rate:
+            status_code, response = response_generator.generate_random_failure()
+            return json_response(client_ip, status_code, response)
+        
+        # Artificial delay yields to the event loop instead of blocking a thread
+        if delay_enabled(config, query_params, request.headers):
+            await asyncio.sleep(thread_rng().uniform(config.response_delay_min, config.response_delay_max))
+        
+        status_code, response = response_generator.respond(request.method, request.url.path, query_params)
+        return json_response(client_ip, status_code, response)
+    
+    return Starlette(routes=[
+        Route('/{path:path}', handle_request, methods=['GET', 'POST', 'PUT', 'DELETE'])
+    ])
+
 # ============================================================================
 # Server Management
 # ============================================================================
@@ -362,6 +713,11 @@ class MockAPIServer:
         self.config = config
         self.rate_limiter = RateLimiter(config)
         self.response_generator = MockResponseGenerator(config)
+        self.concurrency = threading.BoundedSemaphore(config.max_concurrent_requests)
+        
+        # Rate-limit rejections reuse one pre-serialized body; only its
+        # timestamp and request ID are filled in per response
+        self.rate_limit_template = self.response_generator.get_template('hetzner', 'rate-limit-exceeded')
         self.server = None
     
     def create_handler(self):
@@ -372,19 +728,27 @@ class MockAPIServer:
                 config=self.config,
                 rate_limiter=self.rate_limiter,
                 response_generator=self.response_generator,
+                concurrency=self.concurrency,
+                rate_limit_template=self.rate_limit_template,
                 **kwargs
             )
         return handler
     
     def start(self):
         """Start the mock API server"""
+        if self.config.backend == 'asgi':
+            self.start_asgi()
+            return
+        
         handler_class = self.create_handler()
-        self.server = HTTPServer((self.config.host, self.config.port), handler_class)
+        self.server = ThreadingHTTPServer((self.config.host, self.config.port), handler_class)
+        self.server.daemon_threads = True
         
         logging.info(f"Mock API Server starting on {self.config.host}:{self.config.port}")
         logging.info(f"Available providers: {list(self.response_generator.responses.keys())}")
         logging.info(f"Failure rate: {self.config.failure_rate * 100}%")
         logging.info(f"Response delay: {self.config.response_delay_min}-{self.config.response_delay_max}s")
+        logging.info(f"Max concurrent requests: {self.config.max_concurrent_requests}")
         
         try:
             self.server.serve_forever()
@@ -392,6 +756,21 @@ class MockAPIServer:
             logging.info("Mock API Server shutting down...")
             self.server.shutdown()
             self.server.server_close()
+    
+    def start_asgi(self):
+        """Start the mock API server on uvicorn's event loop"""
+        if uvicorn is None:
+            raise RuntimeError("ASGI backend requires starlette and uvicorn (pip install starlette uvicorn)")
+        
+        app = create_asgi_app(self.config, self.rate_limiter, self.response_generator, self.rate_limit_template)
+        
+        logging.info(f"Mock API Server (ASGI) starting on {self.config.host}:{self.config.port}")
+        logging.info(f"Available providers: {list(self.response_generator.responses.keys())}")
+        logging.info(f"Failure rate: {self.config.failure_rate * 100}%")
+        logging.info(f"Response delay: {self.config.response_delay_min}-{self.config.response_delay_max}s")
+        
+        # uvicorn picks uvloop and httptools automatically when they are installed
+        uvicorn.run(app, host=self.config.host, port=self.config.port, log_level='info')
 
 # ============================================================================
 # CLI Interface
@@ -416,6 +795,7 @@ def main():
     parser.add_argument('--rate-limit', type=int, default=100, help='Rate limit (requests per hour)')
     parser.add_argument('--verbose', '-v', action='store_true', help='Enable verbose logging')
     parser.add_argument('--test-data-dir', help='Test data directory path')
+    parser.add_argument('--backend', choices=['threading', 'asgi'], help='Server backend (asgi requires starlette and uvicorn)')
     
     args = parser.parse_args()
     
@@ -433,6 +813,9 @@ def main():
     if args.test_data_dir:
         config.test_data_dir = args.test_data_dir
     
+    if args.backend:
+        config.backend = args.backend
+    
     # Start server
     server = MockAPIServer(config)
     
@@ -452,6 +835,9 @@ Usage Examples:
   # Test quota exceeded
   curl http://{config.host}:{config.port}/aws/instances?scenario=quota-exceeded
 
+  # Skip the artificial response delay
+  curl http://{config.host}:{config.port}/hetzner/servers?delay=false
+
   # List available scenarios
   curl http://{config.host}:{config.port}/hetzner/test-scenarios
 
@@ -459,6 +845,7 @@ Configuration:
   - Failure Rate: {config.failure_rate * 100}%
   - Response Delay: {config.response_delay_min}-{config.response_delay_max}s
   - Rate Limit: {config.rate_limit_requests} requests/hour
+  - Backend: {config.backend}
 
 Press Ctrl+C to stop the server
 """)